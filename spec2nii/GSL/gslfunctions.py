@@ -5,6 +5,11 @@ Copyright (C) 2020 University of Oxford '''
 import numpy as np
 
 
+def _isclose(a, b, rtol=1e-05, atol=1e-08):
+    '''Scalar form of np.isclose (same tolerances), without the array ufunc overhead.'''
+    return abs(a - b) <= (atol + rtol * abs(b))
+
+
 def class_ori(sag_comp, cor_comp, tra_comp, debug):
     ''' Python implementation of IDEA-VB17/n4/pkg/MrServers/MrMeasSrv/SeqFW/libGSL/fGSLClassOri.cpp
     Function to determine whether a normal vector describes a sagittal, coronal or transverse slice.
@@ -24,13 +29,13 @@ def class_ori(sag_comp, cor_comp, tra_comp, debug):
         print(f'Normal vector = {sag_comp: 10.7f} {cor_comp: 10.7f} {tra_comp: 10.7f}.')
 
     # Compute some temporary values
-    abs_sag_comp     = np.abs(sag_comp)
-    abs_cor_comp     = np.abs(cor_comp)
-    abs_tra_comp     = np.abs(tra_comp)
+    abs_sag_comp     = abs(sag_comp)
+    abs_cor_comp     = abs(cor_comp)
+    abs_tra_comp     = abs(tra_comp)
 
-    eq_sag_cor = np.isclose(abs_sag_comp, abs_cor_comp)
-    eq_sag_tra = np.isclose(abs_sag_comp, abs_tra_comp)
-    eq_cor_tra = np.isclose(abs_cor_comp, abs_tra_comp)
+    eq_sag_cor = _isclose(abs_sag_comp, abs_cor_comp)
+    eq_sag_tra = _isclose(abs_sag_comp, abs_tra_comp)
+    eq_cor_tra = _isclose(abs_cor_comp, abs_tra_comp)
 
     # Determine the slice orientation (sag, cor, tra)
     if ((eq_sag_cor              & eq_sag_tra)             |
@@ -92,17 +97,21 @@ def calc_prs(gs, phi, debug):
     orientation = orientation + class_ori(gs[SAGITTAL], gs[CORONAL], gs[TRANSVERSE], debug)
     gp  = np.zeros((3), dtype=float)
 
+    # Normalisation factors are computed once per branch
     if orientation == TRANSVERSE:
+        norm = np.sqrt(1. / (gs[1] * gs[1] + gs[2] * gs[2]))
         gp[0] = 0.0
-        gp[1] = gs[2] * np.sqrt(1. / (gs[1] * gs[1] + gs[2] * gs[2]))
-        gp[2] = -gs[1] * np.sqrt(1. / (gs[1] * gs[1] + gs[2] * gs[2]))
+        gp[1] = gs[2] * norm
+        gp[2] = -gs[1] * norm
     elif orientation == CORONAL:
-        gp[0] = gs[1] * np.sqrt(1. / (gs[0] * gs[0] + gs[1] * gs[1]))
-        gp[1] = -gs[0] * np.sqrt(1. / (gs[0] * gs[0] + gs[1] * gs[1]))
+        norm = np.sqrt(1. / (gs[0] * gs[0] + gs[1] * gs[1]))
+        gp[0] = gs[1] * norm
+        gp[1] = -gs[0] * norm
         gp[2] = 0.0
     elif orientation == SAGITTAL:
-        gp[0] = -gs[1] * np.sqrt(1. / (gs[0] * gs[0] + gs[1] * gs[1]))
-        gp[1] = gs[0] * np.sqrt(1. / (gs[0] * gs[0] + gs[1] * gs[1]))
+        norm = np.sqrt(1. / (gs[0] * gs[0] + gs[1] * gs[1]))
+        gp[0] = -gs[1] * norm
+        gp[1] = gs[0] * norm
         gp[2] = 0.0
     else:
         raise ValueError('Invalid slice orientation returned from class_ori')
@@ -126,9 +135,7 @@ def calc_prs(gs, phi, debug):
             tmp = phi * 180.0 / np.pi
             print(f'PHI = {tmp:10.7f}')
 
-    gp[0] = np.cos(phi) * gp[0] - np.sin(phi) * gr[0]
-    gp[1] = np.cos(phi) * gp[1] - np.sin(phi) * gr[1]
-    gp[2] = np.cos(phi) * gp[2] - np.sin(phi) * gr[2]
+    gp = np.cos(phi) * gp - np.sin(phi) * gr
 
     # Calculate new GR = GS x GP
     gr[0] = gs[1] * gp[2] - gs[2] * gp[1]
@@ -3,8 +3,9 @@ Author: William Clarke <william.clarke@ndcn.ox.ac.uk>
 Copyright (C) 2020 University of Oxford
 """
 import re
+from functools import lru_cache
+from itertools import product
 from os.path import basename
-from datetime import datetime
 
 import numpy as np
 from nifti_mrs.create_nmrs import gen_nifti_mrs_hdr_ext
@@ -13,6 +14,7 @@ from nifti_mrs.hdr_ext import Hdr_Ext
 import spec2nii.GSL.gslfunctions as GSL
 from spec2nii.dcm2niiOrientation.orientationFuncs import dcm_to_nifti_orientation
 from spec2nii import __version__ as spec2nii_ver
+from spec2nii._conversion_time import get_conversion_time
 
 
 # Define some default dimension information.
@@ -38,6 +40,28 @@ defaults = {'vb': {'Col': 'time',
 
 xa_product_seq = ['svs_se', 'svs_st', 'svs_slaser']
 
+# MeasYaps keys shared across the conversion, orientation and metadata functions.
+dwell_time_key = ('sRXSPEC', 'alDwellTime', '0')
+n_slices_key = ('sGroupArray', 'asGroup', '0', 'nSize')
+# Orientation fields as (slice-selective key, SVS VoI key) pairs.
+orientation_keys = {
+    'normal_sag': (('sSliceArray', 'asSlice', '0', 'sNormal', 'dSag'), ('sSpecPara', 'sVoI', 'sNormal', 'dSag')),
+    'normal_cor': (('sSliceArray', 'asSlice', '0', 'sNormal', 'dCor'), ('sSpecPara', 'sVoI', 'sNormal', 'dCor')),
+    'normal_tra': (('sSliceArray', 'asSlice', '0', 'sNormal', 'dTra'), ('sSpecPara', 'sVoI', 'sNormal', 'dTra')),
+    'inplane_rot': (('sSliceArray', 'asSlice', '0', 'dInPlaneRot'), ('sSpecPara', 'sVoI', 'dInPlaneRot')),
+    'readout_fov': (('sSliceArray', 'asSlice', '0', 'dReadoutFOV'), ('sSpecPara', 'sVoI', 'dReadoutFOV')),
+    'phase_fov': (('sSliceArray', 'asSlice', '0', 'dPhaseFOV'), ('sSpecPara', 'sVoI', 'dPhaseFOV')),
+    'thickness': (('sSliceArray', 'asSlice', '0', 'dThickness'), ('sSpecPara', 'sVoI', 'dThickness')),
+    'pos_sag': (('sSliceArray', 'asSlice', '0', 'sPosition', 'dSag'), ('sSpecPara', 'sVoI', 'sPosition', 'dSag')),
+    'pos_cor': (('sSliceArray', 'asSlice', '0', 'sPosition', 'dCor'), ('sSpecPara', 'sVoI', 'sPosition', 'dCor')),
+    'pos_tra': (('sSliceArray', 'asSlice', '0', 'sPosition', 'dTra'), ('sSpecPara', 'sVoI', 'sPosition', 'dTra'))}
+scan_region_keys = (('lScanRegionPosSag',), ('lScanRegionPosCor',), ('lScanRegionPosTra',))
+rx_coil_keys = (('sCoilSelectMeas', 'aRxCoilSelectData', '0', 'asList', '0', 'sCoilElementID', 'tCoilID'),
+                ('asCoilSelectMeas', '0', 'asList', '0', 'sCoilElementID', 'tCoilID'))
+
+# NIfTI-MRS ConversionMethod value
+conversion_method = f'spec2nii v{spec2nii_ver}'
+
 
 class IncompatibleSoftwareVersion(Exception):
     pass
@@ -187,7 +211,7 @@ def process_mrsi(twixObj, base_name_out, name_in, dataKey, remove_os=True, quiet
     data = np.zeros(data_size, dtype=complex)
 
     # Extract dwellTime
-    dwellTime = twixObj['hdr']['MeasYaps'][('sRXSPEC', 'alDwellTime', '0')] / 1E9
+    dwellTime = twixObj['hdr']['MeasYaps'][dwell_time_key] / 1E9
     if remove_os:
         dwellTime *= 2
 
@@ -220,15 +244,17 @@ def process_svs(twixObj, base_name_out, name_in, dataKey, dim_overrides, remove_
     """
 
     # Set squeeze data
-    twixObj[dataKey].flagRemoveOS = remove_os
-    twixObj[dataKey].squeeze = True
-    squeezedData = twixObj[dataKey]['']
+    twix_data = twixObj[dataKey]
+    twix_data.flagRemoveOS = remove_os
+    twix_data.squeeze = True
+    squeezedData = twix_data['']
 
     if not quiet:
         print(f'Found data of size {squeezedData.shape}.')
 
     # Conjugate the data from the twix file to match the phase conventions of the format
-    squeezedData = squeezedData.conj()
+    # mapVBVD returns a freshly read array, so conjugate in place rather than allocating a copy.
+    np.conjugate(squeezedData, out=squeezedData)
 
     # Perform Orientation calculations
     # 1) Calculate dicom like imageOrientationPatient,imagePositionPatient,pixelSpacing and slicethickness
@@ -254,12 +280,12 @@ def process_svs(twixObj, base_name_out, name_in, dataKey, dim_overrides, remove_
     # orientation = NIFTIOrient(Q44)
 
     # Extract dwellTime
-    dwellTime = twixObj['hdr']['MeasYaps'][('sRXSPEC', 'alDwellTime', '0')] / 1E9
+    dwellTime = twixObj['hdr']['MeasYaps'][dwell_time_key] / 1E9
     if remove_os:
         dwellTime *= 2
 
     # Extract metadata
-    meta_obj = extractTwixMetadata(twixObj['hdr'], basename(twixObj[dataKey].filename))
+    meta_obj = extractTwixMetadata(twixObj['hdr'], basename(twix_data.filename))
 
     # Identify what those indices are
     # If cha is one: loop over 3rd and higher dims and make 2D images
@@ -270,13 +296,13 @@ def process_svs(twixObj, base_name_out, name_in, dataKey, dim_overrides, remove_
     else:
         mainStr = name_in.split('.')[0]
 
-    dims = twixObj[dataKey].sqzDims
+    # sqzDims is recomputed by mapVBVD on every access, bind it once
+    dims = twix_data.sqzDims
     if dims[0] != 'Col':
         # This is very unlikely to occur but would cause complete failure.
         raise ValueError('Col is expected to be the first dimension in the Twix file, it is not.')
 
-    curr_defaults = defaults[twixObj[dataKey].softwareVersion]
-    dim_order = twixObj[dataKey].sqzDims[1:]
+    dim_order = dims[1:]
 
     # SPECIAL CASE FOR XA 20/30 product sequences.
     # A single? reference scan is encoded in the first element of the phs loop
@@ -316,7 +342,7 @@ def process_svs(twixObj, base_name_out, name_in, dataKey, dim_overrides, remove_
         else:
             ref_tags = ['DIM_COIL', None, None]
 
-        meta_obj_ref = extractTwixMetadata(twixObj['hdr'], basename(twixObj[dataKey].filename))
+        meta_obj_ref = extractTwixMetadata(twixObj['hdr'], basename(twix_data.filename))
         meta_obj_ref.set_standard_def('WaterSuppressed', True)
 
         nifti_mrs_out.append(
@@ -329,40 +355,17 @@ def process_svs(twixObj, base_name_out, name_in, dataKey, dim_overrides, remove_
 
         filename_out.append(mainStr + '_ref')
 
-    # Make list of tags (both default and user specified)
-    dim_tags = []
-    unknown_counter = 0
-    for do in dim_order:
-        if do in curr_defaults.keys():
-            dim_tags.append(curr_defaults[do])
-        else:
-            dim_tags.append(f'DIM_USER_{unknown_counter}')
-            unknown_counter += 1
-
-    # Now process the user specified order
-    for dim_index in range(3):
-        if dim_overrides['dims'][dim_index]:
-            if dim_overrides['dims'][dim_index] in dim_order:
-                curr_index = dim_order.index(dim_overrides['dims'][dim_index])
-                dim_order[dim_index], dim_order[curr_index] = dim_order[curr_index], dim_order[dim_index]
-                dim_tags[dim_index], dim_tags[curr_index] = dim_tags[curr_index], dim_tags[dim_index]
-            else:
-                dim_order.insert(dim_index, dim_overrides['dims'][0])
-                if dim_overrides['dims'][dim_index] in curr_defaults.keys():
-                    dim_tags.insert(dim_index, curr_defaults['tags'][dim_overrides['dims'][dim_index]])
-                else:
-                    dim_tags.insert(dim_index, f'DIM_USER_{unknown_counter}')
-                    unknown_counter += 1
+    # Resolve dimension order, tags and the permutation to apply to the data
+    dim_order, dim_tags, perm = _dimension_plan(
+        twix_data.softwareVersion,
+        tuple(dims),
+        tuple(dim_order),
+        tuple(dim_overrides['dims']),
+        tuple(dim_overrides['tags']))
+    dim_order, dim_tags = list(dim_order), list(dim_tags)
 
-    # Override with any of the specified tags
-    for idx, tag in enumerate(dim_overrides['tags']):
-        if tag:
-            dim_tags[idx] = tag
-
-    # Permute the order of dimension in the data
-    original = list(range(1, squeezedData.ndim))
-    new = [twixObj[dataKey].sqzDims.index(dd) for dd in dim_order]
-    reord_data = np.moveaxis(squeezedData, original, new)
+    # Permute the order of dimension in the data (a view, no copy)
+    reord_data = squeezedData.transpose(perm)
 
     # Special-cased sequences
     # MGS SVS: MEGA-PRESS, HERMES, etc.
@@ -445,7 +448,7 @@ def process_svs(twixObj, base_name_out, name_in, dataKey, dim_overrides, remove_
 
     else:
         # loop over any dimensions over 4
-        for index in np.ndindex(reord_data.shape[4:]):
+        for index in product(*(range(n) for n in reord_data.shape[4:])):
             modIndex = (slice(None), slice(None), slice(None), slice(None)) + index
 
             # Pad with three singleton dimensions (x,y,z)
@@ -480,15 +483,17 @@ def process_fid(twixObj, base_name_out, name_in, dataKey, dim_overrides, remove_
     """
 
     # Set squeeze data
-    twixObj[dataKey].flagRemoveOS = remove_os
-    twixObj[dataKey].squeeze = True
-    squeezedData = twixObj[dataKey]['']
+    twix_data = twixObj[dataKey]
+    twix_data.flagRemoveOS = remove_os
+    twix_data.squeeze = True
+    squeezedData = twix_data['']
 
     if not quiet:
         print(f'Found data of size {squeezedData.shape}.')
 
     # Conjugate the data from the twix file to match the phase conventions of the format
-    squeezedData = squeezedData.conj()
+    # mapVBVD returns a freshly read array, so conjugate in place rather than allocating a copy.
+    np.conjugate(squeezedData, out=squeezedData)
 
     # Perform Orientation calculations
     # 1) Calculate dicom like imageOrientationPatient,imagePositionPatient,pixelSpacing and slicethickness
@@ -514,12 +519,12 @@ def process_fid(twixObj, base_name_out, name_in, dataKey, dim_overrides, remove_
     # orientation = NIFTIOrient(Q44)
 
     # Extract dwellTime
-    dwellTime = twixObj['hdr']['MeasYaps'][('sRXSPEC', 'alDwellTime', '0')] / 1E9
+    dwellTime = twixObj['hdr']['MeasYaps'][dwell_time_key] / 1E9
     if remove_os:
         dwellTime *= 2
 
     # Extract metadata
-    meta_obj = extractTwixMetadata(twixObj['hdr'], basename(twixObj[dataKey].filename))
+    meta_obj = extractTwixMetadata(twixObj['hdr'], basename(twix_data.filename))
 
     # Identify what those indices are
     # If cha is one: loop over 3rd and higher dims and make 2D images
@@ -530,13 +535,13 @@ def process_fid(twixObj, base_name_out, name_in, dataKey, dim_overrides, remove_
     else:
         mainStr = name_in.split('.')[0]
 
-    dims = twixObj[dataKey].sqzDims
+    # sqzDims is recomputed by mapVBVD on every access, bind it once
+    dims = twix_data.sqzDims
     if dims[0] != 'Col':
         # This is very unlikely to occur but would cause complete failure.
         raise ValueError('Col is expected to be the first dimension in the Twix file, it is not.')
 
-    curr_defaults = defaults[twixObj[dataKey].softwareVersion]
-    dim_order = twixObj[dataKey].sqzDims[1:]
+    dim_order = dims[1:]
 
     # SPECIAL CASE FOR XA 20/30 product sequences.
     # A single? reference scan is encoded in the first element of the phs loop
@@ -563,40 +568,17 @@ def process_fid(twixObj, base_name_out, name_in, dataKey, dim_overrides, remove_
     else:
         xa_ref_scans = None
 
-    # Make list of tags (both default and user specified)
-    dim_tags = []
-    unknown_counter = 0
-    for do in dim_order:
-        if do in curr_defaults.keys():
-            dim_tags.append(curr_defaults[do])
-        else:
-            dim_tags.append(f'DIM_USER_{unknown_counter}')
-            unknown_counter += 1
-
-    # Now process the user specified order
-    for dim_index in range(3):
-        if dim_overrides['dims'][dim_index]:
-            if dim_overrides['dims'][dim_index] in dim_order:
-                curr_index = dim_order.index(dim_overrides['dims'][dim_index])
-                dim_order[dim_index], dim_order[curr_index] = dim_order[curr_index], dim_order[dim_index]
-                dim_tags[dim_index], dim_tags[curr_index] = dim_tags[curr_index], dim_tags[dim_index]
-            else:
-                dim_order.insert(dim_index, dim_overrides['dims'][0])
-                if dim_overrides['dims'][dim_index] in curr_defaults.keys():
-                    dim_tags.insert(dim_index, curr_defaults['tags'][dim_overrides['dims'][dim_index]])
-                else:
-                    dim_tags.insert(dim_index, f'DIM_USER_{unknown_counter}')
-                    unknown_counter += 1
+    # Resolve dimension order, tags and the permutation to apply to the data
+    dim_order, dim_tags, perm = _dimension_plan(
+        twix_data.softwareVersion,
+        tuple(dims),
+        tuple(dim_order),
+        tuple(dim_overrides['dims']),
+        tuple(dim_overrides['tags']))
+    dim_order, dim_tags = list(dim_order), list(dim_tags)
 
-    # Override with any of the specified tags
-    for idx, tag in enumerate(dim_overrides['tags']):
-        if tag:
-            dim_tags[idx] = tag
-
-    # Permute the order of dimension in the data
-    original = list(range(1, squeezedData.ndim))
-    new = [twixObj[dataKey].sqzDims.index(dd) for dd in dim_order]
-    reord_data = np.moveaxis(squeezedData, original, new)
+    # Permute the order of dimension in the data (a view, no copy)
+    reord_data = squeezedData.transpose(perm)
 
     # Now assemble data
     nifti_mrs_out = []
@@ -614,8 +596,12 @@ def process_fid(twixObj, base_name_out, name_in, dataKey, dim_overrides, remove_
         filename_out.append(mainStr)
 
     else:
+        # Every slice shares the same 5th-7th dimension tags, so set them once rather than per slice
+        for idx, dt in zip(range(3), dim_tags):
+            meta_obj.set_dim_info(idx, dt)
+
         # loop over any dimensions over 4
-        for index in np.ndindex(reord_data.shape[4:]):
+        for index in product(*(range(n) for n in reord_data.shape[4:])):
             modIndex = (slice(None), slice(None), slice(None), slice(None)) + index
 
             # Pad with three singleton dimensions (x,y,z)
@@ -625,8 +611,7 @@ def process_fid(twixObj, base_name_out, name_in, dataKey, dim_overrides, remove_
                 assemble_nifti_mrs(reord_data[modIndex].reshape(newshape),
                                    dwellTime,
                                    orientation,
-                                   meta_obj,
-                                   dim_tags))
+                                   meta_obj))
 
             # Create strings
             out_name = f'{mainStr}'
@@ -644,7 +629,7 @@ def process_fid(twixObj, base_name_out, name_in, dataKey, dim_overrides, remove_
         else:
             ref_tags = ['DIM_COIL', None, None]
 
-        meta_obj_ref = extractTwixMetadata(twixObj['hdr'], basename(twixObj[dataKey].filename))
+        meta_obj_ref = extractTwixMetadata(twixObj['hdr'], basename(twix_data.filename))
         meta_obj_ref.set_standard_def('WaterSuppressed', True)
 
         nifti_mrs_out.append(
@@ -660,6 +645,60 @@ def process_fid(twixObj, base_name_out, name_in, dataKey, dim_overrides, remove_
     return nifti_mrs_out, filename_out
 
 
+@lru_cache(maxsize=32)
+def _dimension_plan(software_version, sqz_dims, dim_order, override_dims, override_tags):
+    """Resolve the dimension order, NIfTI-MRS dimension tags and data permutation for squeezed twix data.
+
+    The result depends only on the dimension names and the user overrides, so it is cached
+    and reused across files acquired with the same protocol.
+
+    :param software_version: mapVBVD software version ('vb' or 'vd')
+    :param sqz_dims: Squeezed dimension names (first is 'Col')
+    :param dim_order: Names of the non-time dimensions present in the data
+    :param override_dims: User specified dimension names for the 5th-7th dimensions
+    :param override_tags: User specified tags for the 5th-7th dimensions
+    :return: Tuples of the reordered dimension names, their tags and the permutation to pass to transpose
+    :rtype: tuple
+    """
+    curr_defaults = defaults[software_version]
+    dim_order = list(dim_order)
+
+    # Make list of tags (both default and user specified)
+    dim_tags = []
+    unknown_counter = 0
+    for do in dim_order:
+        if do in curr_defaults.keys():
+            dim_tags.append(curr_defaults[do])
+        else:
+            dim_tags.append(f'DIM_USER_{unknown_counter}')
+            unknown_counter += 1
+
+    # Now process the user specified order.
+    # Requested dimensions are swapped into place, the list length is fixed by the data.
+    for dim_index, override in enumerate(override_dims[:3]):
+        if not override:
+            continue
+        if override not in dim_order:
+            raise ValueError(f'Dimension {override} (dim {dim_index + 5}) is not present in the data, '
+                             f'available dimensions are {dim_order}.')
+        curr_index = dim_order.index(override)
+        dim_order[dim_index], dim_order[curr_index] = dim_order[curr_index], dim_order[dim_index]
+        dim_tags[dim_index], dim_tags[curr_index] = dim_tags[curr_index], dim_tags[dim_index]
+
+    # Override with any of the specified tags
+    for idx, tag in enumerate(override_tags):
+        if tag:
+            dim_tags[idx] = tag
+
+    # Permutation equivalent to np.moveaxis(data, range(1, ndim), new) as a single transpose
+    new = [sqz_dims.index(dd) for dd in dim_order]
+    perm = [0] * (len(new) + 1)
+    for src, dst in enumerate(new, start=1):
+        perm[dst] = src
+
+    return tuple(dim_order), tuple(dim_tags), tuple(perm)
+
+
 def assemble_nifti_mrs(data, dwellTime, orientation, meta_obj, dim_tags=None):
 
     if dim_tags is not None:
@@ -686,104 +725,55 @@ def twix2DCMOrientation(mapVBVDHdr, force_svs=False, verbose=False):
         sliceThickness
 
     """
-    # Only single-slices are supported -- throw an error otherwise
+    meas_yaps = mapVBVDHdr['MeasYaps']
 
-    if ('sGroupArray', 'asGroup', '0', 'nSize') in mapVBVDHdr['MeasYaps']:
-        nSlices = mapVBVDHdr['MeasYaps'][('sGroupArray', 'asGroup', '0', 'nSize')]
-        if nSlices != 1.0:
-            raise ValueError('In slice-selective spectroscopy, only the first slice is supported')
+    def slice_or_voi(field, default):
+        """Return slice-selective value (unless force_svs), else the SVS VoI value, else default."""
+        slice_key, voi_key = orientation_keys[field]
+        if not force_svs and slice_key in meas_yaps:
+            return meas_yaps[slice_key]
+        return meas_yaps.get(voi_key, default)
+
+    # Only single-slices are supported -- throw an error otherwise
+    nSlices = meas_yaps.get(n_slices_key, 1.0)
+    if nSlices != 1.0:
+        raise ValueError('In slice-selective spectroscopy, only the first slice is supported')
 
     # Orientation information
     # Added the force_svs because in some sequences there are slice objects initialised
     # and recorded but this seems sporadic behaviour.
-    if ('sSliceArray', 'asSlice', '0', 'sNormal', 'dSag') in mapVBVDHdr['MeasYaps']\
-            and not force_svs:
-        # This is for slice-selective spectroscopy
-        NormaldSag = mapVBVDHdr['MeasYaps'][('sSliceArray', 'asSlice', '0', 'sNormal', 'dSag')]
-    elif ('sSpecPara', 'sVoI', 'sNormal', 'dSag') in mapVBVDHdr['MeasYaps']:
-        NormaldSag = mapVBVDHdr['MeasYaps'][('sSpecPara', 'sVoI', 'sNormal', 'dSag')]
-    else:
-        NormaldSag = 0.0
-
-    if ('sSliceArray', 'asSlice', '0', 'sNormal', 'dCor') in mapVBVDHdr['MeasYaps']\
-            and not force_svs:
-        NormaldCor = mapVBVDHdr['MeasYaps'][('sSliceArray', 'asSlice', '0', 'sNormal', 'dCor')]
-    elif ('sSpecPara', 'sVoI', 'sNormal', 'dCor') in mapVBVDHdr['MeasYaps']:
-        NormaldCor = mapVBVDHdr['MeasYaps'][('sSpecPara', 'sVoI', 'sNormal', 'dCor')]
-    else:
-        NormaldCor = 0.0
-
-    if ('sSliceArray', 'asSlice', '0', 'sNormal', 'dTra') in mapVBVDHdr['MeasYaps']\
-            and not force_svs:
-        NormaldTra = mapVBVDHdr['MeasYaps'][('sSliceArray', 'asSlice', '0', 'sNormal', 'dTra')]
-    elif ('sSpecPara', 'sVoI', 'sNormal', 'dTra') in mapVBVDHdr['MeasYaps']:
-        NormaldTra = mapVBVDHdr['MeasYaps'][('sSpecPara', 'sVoI', 'sNormal', 'dTra')]
-    else:
-        NormaldTra = 0.0
-
-    if ('sSliceArray', 'asSlice', '0', 'dInPlaneRot') in mapVBVDHdr['MeasYaps']\
-            and not force_svs:
-        inplaneRotation = mapVBVDHdr['MeasYaps'][('sSliceArray', 'asSlice', '0', 'dInPlaneRot')]
-    elif ('sSpecPara', 'sVoI', 'dInPlaneRot') in mapVBVDHdr['MeasYaps']:
-        inplaneRotation = mapVBVDHdr['MeasYaps'][('sSpecPara', 'sVoI', 'dInPlaneRot')]
-    else:
-        inplaneRotation = 0.0
+    NormaldSag = slice_or_voi('normal_sag', 0.0)
+    NormaldCor = slice_or_voi('normal_cor', 0.0)
+    NormaldTra = slice_or_voi('normal_tra', 0.0)
+    inplaneRotation = slice_or_voi('inplane_rot', 0.0)
 
     TwixSliceNormal = np.array([NormaldSag, NormaldCor, NormaldTra], dtype=float)
     # If all zeros make a 'normal' orientation (e.g. for unlocalised data)
     if not TwixSliceNormal.any():
         TwixSliceNormal[0] += 1.0
 
-    if ('sSliceArray', 'asSlice', '0', 'dReadoutFOV') in mapVBVDHdr['MeasYaps']\
-            and not force_svs:
-        RoFoV = mapVBVDHdr['MeasYaps'][('sSliceArray', 'asSlice', '0', 'dReadoutFOV')]
-        PeFoV = mapVBVDHdr['MeasYaps'][('sSliceArray', 'asSlice', '0', 'dPhaseFOV')]
-    elif ('sSpecPara', 'sVoI', 'dReadoutFOV') in mapVBVDHdr['MeasYaps']:
-        RoFoV = mapVBVDHdr['MeasYaps'][('sSpecPara', 'sVoI', 'dReadoutFOV')]
-        PeFoV = mapVBVDHdr['MeasYaps'][('sSpecPara', 'sVoI', 'dPhaseFOV')]
+    ro_slice_key, ro_voi_key = orientation_keys['readout_fov']
+    pe_slice_key, pe_voi_key = orientation_keys['phase_fov']
+    if not force_svs and ro_slice_key in meas_yaps:
+        RoFoV = meas_yaps[ro_slice_key]
+        PeFoV = meas_yaps[pe_slice_key]
+    elif ro_voi_key in meas_yaps:
+        RoFoV = meas_yaps[ro_voi_key]
+        PeFoV = meas_yaps[pe_voi_key]
     else:
         RoFoV = 10000.0
         PeFoV = 10000.0
 
-    if ('sSliceArray', 'asSlice', '0', 'dThickness') in mapVBVDHdr['MeasYaps']\
-            and not force_svs:
-        sliceThickness = mapVBVDHdr['MeasYaps'][('sSliceArray', 'asSlice', '0', 'dThickness')]
-    elif ('sSpecPara', 'sVoI', 'dThickness') in mapVBVDHdr['MeasYaps']:
-        sliceThickness = mapVBVDHdr['MeasYaps'][('sSpecPara', 'sVoI', 'dThickness')]
-    else:
-        sliceThickness = 10000.0
+    sliceThickness = slice_or_voi('thickness', 10000.0)
 
     # Position info (including table position)
-    if ('sSliceArray', 'asSlice', '0', 'sPosition', 'dSag') in mapVBVDHdr['MeasYaps']\
-            and not force_svs:
-        PosdSag = mapVBVDHdr['MeasYaps'][('sSliceArray', 'asSlice', '0', 'sPosition', 'dSag')]
-    elif ('sSpecPara', 'sVoI', 'sPosition', 'dSag') in mapVBVDHdr['MeasYaps']:
-        PosdSag = mapVBVDHdr['MeasYaps'][('sSpecPara', 'sVoI', 'sPosition', 'dSag')]
-    else:
-        PosdSag = 0.0
-
-    if ('sSliceArray', 'asSlice', '0', 'sPosition', 'dCor') in mapVBVDHdr['MeasYaps']\
-            and not force_svs:
-        PosdCor = mapVBVDHdr['MeasYaps'][('sSliceArray', 'asSlice', '0', 'sPosition', 'dCor')]
-    elif ('sSpecPara', 'sVoI', 'sPosition', 'dCor') in mapVBVDHdr['MeasYaps']:
-        PosdCor = mapVBVDHdr['MeasYaps'][('sSpecPara', 'sVoI', 'sPosition', 'dCor')]
-    else:
-        PosdCor = 0.0
-
-    if ('sSliceArray', 'asSlice', '0', 'sPosition', 'dTra') in mapVBVDHdr['MeasYaps']\
-            and not force_svs:
-        PosdTra = mapVBVDHdr['MeasYaps'][('sSliceArray', 'asSlice', '0', 'sPosition', 'dTra')]
-    elif ('sSpecPara', 'sVoI', 'sPosition', 'dTra') in mapVBVDHdr['MeasYaps']:
-        PosdTra = mapVBVDHdr['MeasYaps'][('sSpecPara', 'sVoI', 'sPosition', 'dTra')]
-    else:
-        PosdTra = 0.0
+    PosdSag = slice_or_voi('pos_sag', 0.0)
+    PosdCor = slice_or_voi('pos_cor', 0.0)
+    PosdTra = slice_or_voi('pos_tra', 0.0)
 
-    if ('lScanRegionPosSag',) in mapVBVDHdr['MeasYaps']:
-        PosdSag += mapVBVDHdr['MeasYaps'][('lScanRegionPosSag',)]
-    if ('lScanRegionPosCor',) in mapVBVDHdr['MeasYaps']:
-        PosdCor += mapVBVDHdr['MeasYaps'][('lScanRegionPosCor',)]
-    if ('lScanRegionPosTra',) in mapVBVDHdr['MeasYaps']:
-        PosdTra += mapVBVDHdr['MeasYaps'][('lScanRegionPosTra',)]
+    PosdSag += meas_yaps.get(scan_region_keys[0], 0.0)
+    PosdCor += meas_yaps.get(scan_region_keys[1], 0.0)
+    PosdTra += meas_yaps.get(scan_region_keys[2], 0.0)
 
     if id_sequence_type(mapVBVDHdr) == 'mrsi':
         data_size_pe = 1
@@ -814,7 +804,9 @@ def twix2DCMOrientation(mapVBVDHdr, force_svs=False, verbose=False):
 
     else:
         dColVec_vector, dRowVec_vector = GSL.calc_prs(TwixSliceNormal, inplaneRotation, verbose)
-        imageOrientationPatient = np.stack((dRowVec_vector, dColVec_vector), axis=0)
+        imageOrientationPatient = np.empty((2, 3), dtype=float)
+        imageOrientationPatient[0] = dRowVec_vector
+        imageOrientationPatient[1] = dColVec_vector
 
         pixelSpacing = np.array([PeFoV, RoFoV])  # [RoFoV PeFoV];
 
@@ -869,7 +861,9 @@ def CSIOrientations(slice_normal, ip_rot, fov_pe, fov_ro, fov_sl, n_pe, n_ro, n_
         dim_swapped = True
         imagePositionPatient =\
             base_pos - (dRowVec_vector * fov_ro / 2) - (dColVec_vector * fov_pe / 2)
-    imageOrientationPatient = np.stack((dRowVec_vector, dColVec_vector), axis=0)
+    imageOrientationPatient = np.empty((2, 3), dtype=float)
+    imageOrientationPatient[0] = dRowVec_vector
+    imageOrientationPatient[1] = dColVec_vector
 
     return imageOrientationPatient, imagePositionPatient, pixelSpacing, fov_sl, dim_swapped
 
@@ -967,8 +961,7 @@ def extractTwixMetadata_xa(mapVBVDHdr, original_file):
     tx_coil_tuple = ('sCoilSelectMeas', 'aTxCoilSelectData', '0', 'asList', '0', 'sCoilElementID', 'tCoilID')
     obj.set_standard_def('TxCoil', mapVBVDHdr['MeasYaps'][tx_coil_tuple])
     # 'RxCoil'
-    rx_coil_1 = ('sCoilSelectMeas', 'aRxCoilSelectData', '0', 'asList', '0', 'sCoilElementID', 'tCoilID')
-    rx_coil_2 = ('asCoilSelectMeas', '0', 'asList', '0', 'sCoilElementID', 'tCoilID')
+    rx_coil_1, rx_coil_2 = rx_coil_keys
     if rx_coil_1 in mapVBVDHdr['MeasYaps']:
         obj.set_standard_def('RxCoil', mapVBVDHdr['MeasYaps'][rx_coil_1])
     elif rx_coil_2 in mapVBVDHdr['MeasYaps']:
@@ -1007,10 +1000,9 @@ def extractTwixMetadata_xa(mapVBVDHdr, original_file):
 
     # # 5.5 Provenance and conversion metadata
     # 'ConversionMethod'
-    obj.set_standard_def('ConversionMethod', f'spec2nii v{spec2nii_ver}')
+    obj.set_standard_def('ConversionMethod', conversion_method)
     # 'ConversionTime'
-    conversion_time = datetime.now().isoformat(sep='T', timespec='milliseconds')
-    obj.set_standard_def('ConversionTime', conversion_time)
+    obj.set_standard_def('ConversionTime', get_conversion_time())
     # 'OriginalFile'
     obj.set_standard_def('OriginalFile', [original_file, ])
     # # 5.6 Spatial information
@@ -1082,8 +1074,7 @@ def extractTwixMetadata_vx(mapVBVDHdr, original_file):
     obj.set_standard_def('InstitutionAddress', mapVBVDHdr['Dicom'][('InstitutionAddress')])
     # 'TxCoil'
     # 'RxCoil'
-    rx_coil_1 = ('sCoilSelectMeas', 'aRxCoilSelectData', '0', 'asList', '0', 'sCoilElementID', 'tCoilID')
-    rx_coil_2 = ('asCoilSelectMeas', '0', 'asList', '0', 'sCoilElementID', 'tCoilID')
+    rx_coil_1, rx_coil_2 = rx_coil_keys
     if rx_coil_1 in mapVBVDHdr['MeasYaps']:
         obj.set_standard_def('RxCoil', mapVBVDHdr['MeasYaps'][rx_coil_1])
     elif rx_coil_2 in mapVBVDHdr['MeasYaps']:
@@ -1116,10 +1107,9 @@ def extractTwixMetadata_vx(mapVBVDHdr, original_file):
     obj.set_standard_def('PatientSex', sex_str)
     # # 5.5 Provenance and conversion metadata
     # 'ConversionMethod'
-    obj.set_standard_def('ConversionMethod', f'spec2nii v{spec2nii_ver}')
+    obj.set_standard_def('ConversionMethod', conversion_method)
     # 'ConversionTime'
-    conversion_time = datetime.now().isoformat(sep='T', timespec='milliseconds')
-    obj.set_standard_def('ConversionTime', conversion_time)
+    obj.set_standard_def('ConversionTime', get_conversion_time())
     # 'OriginalFile'
     obj.set_standard_def('OriginalFile', [original_file, ])
     # # 5.6 Spatial information
@@ -0,0 +1,25 @@
+"""spec2nii module providing the NIfTI-MRS ConversionTime value.
+The timestamp is cached briefly and shared by files converted in rapid succession.
+"""
+from datetime import datetime
+from time import monotonic
+
+_conv_time = None
+_conv_time_stamp = None
+
+
+def get_conversion_time(max_age=1.0):
+    """Return the ISO 8601 conversion time string (millisecond precision).
+
+    :param max_age: Seconds for which a cached timestamp is reused, None to never expire, defaults to 1.0
+    :type max_age: float, optional
+    :return: Conversion time
+    :rtype: str
+    """
+    global _conv_time, _conv_time_stamp
+    now = monotonic()
+    if _conv_time is None\
+            or (max_age is not None and now - _conv_time_stamp > max_age):
+        _conv_time = datetime.now().isoformat(sep='T', timespec='milliseconds')
+        _conv_time_stamp = now
+    return _conv_time
@@ -3,7 +3,6 @@ Author: William Clarke <william.clarke@ndcn.ox.ac.uk>
 Copyright (C) 2020 University of Oxford
 """
 import re
-from datetime import datetime
 
 import numpy as np
 
@@ -12,6 +11,7 @@ from nifti_mrs.hdr_ext import Hdr_Ext
 
 from spec2nii.nifti_orientation import NIFTIOrient
 from spec2nii import __version__ as spec2nii_ver
+from spec2nii._conversion_time import get_conversion_time
 
 
 default_nuc_index = [None, "1H", "31P", "13C", "19F", "23NA"]
@@ -177,8 +177,7 @@ def jmrui_hdr_to_obj_mrui(header, str_info):
     meta.set_standard_def('TxOffset', header['reference_frequency_ppm'])
 
     meta.set_standard_def('ConversionMethod', 'spec2nii')
-    conversion_time = datetime.now().isoformat(sep='T', timespec='milliseconds')
-    meta.set_standard_def('ConversionTime', conversion_time)
+    meta.set_standard_def('ConversionTime', get_conversion_time())
 
     meta.set_user_def(key='AdditionalInformation',
                       value=str_info,
@@ -266,13 +265,14 @@ def readjMRUItxt(filename):
                 continue
 
             if recordData:
-                curr_data = line.split()
-                if len(curr_data) > 2:
-                    curr_data = curr_data[:2]
-                data.append(list(map(float, curr_data)))
+                # Keep the signal columns as text, parsed in a single C-level pass below
+                data.extend(line.split()[:2])
 
     # Reshape data
-    data = np.concatenate([np.array(i) for i in data])
+    n_values = len(data)
+    data = np.fromstring(' '.join(data), dtype=np.float64, sep=' ')
+    if data.size != n_values:
+        raise ValueError(f'Could not parse all data values in {filename}.')
     data = (data[0::2] + 1j * data[1::2]).astype(complex)
     data = data.reshape((signal_index, -1)).T.squeeze()
     data = data.conj()
@@ -329,8 +329,7 @@ def jmrui_hdr_to_obj(header):
         meta.set_standard_def('PatientName', header['NameOfPatient'])
 
     meta.set_standard_def('ConversionMethod', f'spec2nii v{spec2nii_ver}')
-    conversion_time = datetime.now().isoformat(sep='T', timespec='milliseconds')
-    meta.set_standard_def('ConversionTime', conversion_time)
+    meta.set_standard_def('ConversionTime', get_conversion_time())
 
     if 'AdditionalInformation' in header:
         meta.set_user_def(key='AdditionalInformation',
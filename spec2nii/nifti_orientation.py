@@ -1,5 +1,4 @@
 import numpy as np
-from scipy.spatial.transform import Rotation
 
 
 class NIFTIOrient:
@@ -19,6 +18,8 @@ class NIFTIOrient:
 
 
 def calc_affine(angles, dimensions, shift):
+    # Imported here as scipy.spatial is slow to import and only needed by a few formats
+    from scipy.spatial.transform import Rotation
 
     scalingMat = np.diag(dimensions)
     # Rotations appear to be intrinsic
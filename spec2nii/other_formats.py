@@ -3,7 +3,8 @@ Contains text and LCModel formats.
 Author: William Clarke <william.clarke@ndcn.ox.ac.uk>
 Copyright (C) 2020 University of Oxford
 """
-from datetime import datetime
+import re
+import warnings
 from os.path import basename, splitext
 
 import numpy as np
@@ -11,9 +12,21 @@ from nifti_mrs.create_nmrs import gen_nifti_mrs_hdr_ext
 from nifti_mrs.hdr_ext import Hdr_Ext
 
 from spec2nii import __version__ as spec2nii_ver
+from spec2nii._conversion_time import get_conversion_time
 from spec2nii.nifti_orientation import NIFTIOrient
 
 
+# Default affine (10 m voxel) used when no affine file is given. Shared and read-only.
+default_affine = np.diag([10000.0, 10000.0, 10000.0, 1.0])
+default_affine.setflags(write=False)
+
+# Matches the LCModel namelist fields of interest and their numeric value (applied to lowercase text).
+# Fortran 'd' exponents are accepted, and the number must be complete so a partial value never matches.
+_LCM_HDR_RE = re.compile(
+    r'(hzpppm|dwelltime|deltat|badelt|echot)\w*\s*[:=]?\s*'
+    r'([-+]?(?:\d+\.?\d*|\.\d+)(?:[ed][-+]?\d+)?)(?![\w.+-])')
+
+
 class InsufficentHeaderInformationError(Exception):
     pass
 
@@ -21,8 +34,12 @@ class InsufficentHeaderInformationError(Exception):
 def text(args):
     '''Processing for simple ascii formatted columns of data.'''
     # Read text from file
-    data = np.loadtxt(args.file)
-    data = data[:, 0] + 1j * data[:, 1]
+    # Real and imaginary columns are read into a C-ordered (N, 2) buffer viewed as complex128.
+    # np.loadtxt is C-accelerated from NumPy 1.23 (spec2nii requires >= 1.26) and matches
+    # pandas.read_csv for this two-column case, so no alternative reader is used.
+    data = np.loadtxt(args.file, dtype=np.float64, usecols=(0, 1))
+    data = data.reshape(-1).view(np.complex128)
+    file_name = basename(args.file)
 
     newshape = (1, 1, 1) + data.shape
     data = data.reshape(newshape)
@@ -35,16 +52,14 @@ def text(args):
         args.nucleus)
 
     meta.set_standard_def('ConversionMethod', 'spec2nii')
-    conversion_time = datetime.now().isoformat(sep='T', timespec='milliseconds')
-    meta.set_standard_def('ConversionTime', conversion_time)
-    meta.set_standard_def('OriginalFile', [basename(args.file), ])
+    meta.set_standard_def('ConversionTime', get_conversion_time())
+    meta.set_standard_def('OriginalFile', [file_name, ])
 
     # Read optional affine file
     if args.affine:
         affine = np.loadtxt(args.affine)
     else:
-        tmp = np.array([10000, 10000, 10000, 1])
-        affine = np.diag(tmp)
+        affine = default_affine
 
     nifti_orientation = NIFTIOrient(affine)
 
@@ -59,7 +74,7 @@ def text(args):
     if args.fileout:
         fname_out = [args.fileout, ]
     else:
-        fname_out = [splitext(basename(args.file))[0], ]
+        fname_out = [splitext(file_name)[0], ]
 
     # Place in data output format
     return img_out, fname_out
@@ -70,7 +85,9 @@ def lcm_raw(args):
     Currently only handles one FID per file.
     '''
     # Read data from file
-    data, header = readLCModelRaw(args.file, conjugate=True)
+    dtype = np.complex64 if args.single else np.complex128
+    data, header = readLCModelRaw(args.file, conjugate=True, dtype=dtype)
+    file_name = basename(args.file)
 
     newshape = (1, 1, 1) + data.shape
     data = data.reshape(newshape)
@@ -100,16 +117,14 @@ def lcm_raw(args):
         args.nucleus)
 
     meta.set_standard_def('ConversionMethod', f'spec2nii v{spec2nii_ver}')
-    conversion_time = datetime.now().isoformat(sep='T', timespec='milliseconds')
-    meta.set_standard_def('ConversionTime', conversion_time)
-    meta.set_standard_def('OriginalFile', [basename(args.file), ])
+    meta.set_standard_def('ConversionTime', get_conversion_time())
+    meta.set_standard_def('OriginalFile', [file_name, ])
 
     # Read optional affine file
     if args.affine:
         affine = np.loadtxt(args.affine)
     else:
-        tmp = np.array([10000, 10000, 10000, 1])
-        affine = np.diag(tmp)
+        affine = default_affine
 
     nifti_orientation = NIFTIOrient(affine)
 
@@ -124,19 +139,21 @@ def lcm_raw(args):
     if args.fileout:
         fname_out = [args.fileout, ]
     else:
-        fname_out = [splitext(basename(args.file))[0], ]
+        fname_out = [splitext(file_name)[0], ]
 
     # Place in data output format
     return img_out, fname_out
 
 
-def readLCModelRaw(filename, conjugate=True):
+def readLCModelRaw(filename, conjugate=True, dtype=np.complex128):
     """
     Read .RAW (or.H2O) format file
     Parameters
     ----------
     filename : string
         Name of .RAW file
+    dtype : np.complex128 or np.complex64
+        Precision of the returned complex data, defaults to double precision
 
     Returns
     -------
@@ -146,28 +163,48 @@ def readLCModelRaw(filename, conjugate=True):
         Header information
 
     """
-    header = []
-    data   = []
-    in_header = False
-    with open(filename, 'r') as f:
-        for line in f:
-            if (line.find('$') > 0):
-                in_header = True
-            if in_header:
-                header.append(line)
-            else:
-                data.append(list(map(float, line.split())))
-
-            if line.find('$END') > 0:
-                in_header = False
+    # Read as bytes so the (large) numeric block is handed to NumPy's C parser without decoding
+    with open(filename, 'rb') as f:
+        raw_bytes = f.read()
+
+    # The header namelists ($SEQPAR ... $END, $NMID ... $END) precede the data block.
+    # Locate the end of the line holding the final $END and parse everything after in one go.
+    hdr_end = raw_bytes.rfind(b'$END')
+    if hdr_end > 0:
+        hdr_end = raw_bytes.find(b'\n', hdr_end) + 1 or len(raw_bytes)
+    else:
+        hdr_end = 0
+    # Only the ASCII numeric fields are used, so free-text fields in any 8-bit encoding must not fail to decode
+    header = raw_bytes[:hdr_end].decode('latin-1').splitlines(keepends=True)
 
     # Reshape data
-    data = np.concatenate([np.array(i) for i in data])
-    data = (data[0::2] + 1j * data[1::2]).astype(complex)
+    data_block = raw_bytes[hdr_end:]
+    # np.fromstring returns [-1.] rather than an empty array for a whitespace-only block
+    if not data_block or data_block.isspace():
+        raise ValueError(f'No data found in {filename}.')
+    # NumPy 1.x only warns (and truncates) at the first unparsable token, NumPy 2 raises
+    with warnings.catch_warnings():
+        warnings.simplefilter('error', DeprecationWarning)
+        try:
+            data = np.fromstring(data_block, dtype=np.float64, sep=' ')
+        except (DeprecationWarning, ValueError) as err:
+            raise ValueError(f'Could not parse all data values in {filename}.') from err
+    if data.size == 0:
+        raise ValueError(f'No data found in {filename}.')
+    if data.size % 2:
+        raise ValueError(f'Expected interleaved real/imaginary pairs in {filename}, '
+                         f'found an odd number ({data.size}) of values.')
+    # Interleaved real/imag pairs reinterpreted as complex without a further copy
+    if np.dtype(dtype) == np.complex64:
+        data = data.astype(np.float32).view(np.complex64)
+    elif np.dtype(dtype) == np.complex128:
+        data = data.view(np.complex128)
+    else:
+        raise ValueError(f'dtype must be complex64 or complex128, not {dtype}.')
 
-    # LCModel-specific conjugation
+    # LCModel-specific conjugation, applied in place to the imaginary part of the view
     if conjugate:
-        data = np.conj(data)
+        np.negative(data.imag, out=data.imag)
 
     # Tidy header info
     header = unpackHeader(header)
@@ -182,26 +219,20 @@ def unpackHeader(header):
        Including central frequency, dwelltime, echotime
     """
 
-    def tidy(x):
-        return x.lower().replace(',', '')
-
     tidy_header = dict()
     tidy_header['centralFrequency'] = None
     tidy_header['bandwidth'] = None
     tidy_header['echotime'] = None
-    for line in header:
-        if line.lower().find('hzpppm') > 0:
-            tidy_header['centralFrequency'] = float(tidy(line).split()[-1]) * 1E6
-        if line.lower().find('dwelltime') > 0:
-            tidy_header['dwelltime'] = float(tidy(line).split()[-1])
-            tidy_header['bandwidth'] = 1 / float(tidy(line).split()[-1])
-        if line.lower().find('deltat') > 0:
-            tidy_header['dwelltime'] = float(tidy(line).split()[-1])
-            tidy_header['bandwidth'] = 1 / float(tidy(line).split()[-1])
-        if line.lower().find('echot') > 0:
-            tidy_header['echotime'] = float(tidy(line).split()[-1]) / 1e3
-        if line.lower().find('badelt') > 0:
-            tidy_header['dwelltime'] = float(tidy(line).split()[-1])
-            tidy_header['bandwidth'] = 1 / float(tidy(line).split()[-1])
+    header_text = ''.join(header).lower().replace(',', '')
+    for match in _LCM_HDR_RE.finditer(header_text):
+        key, value = match.group(1), float(match.group(2).replace('d', 'e'))
+        if key == 'hzpppm':
+            tidy_header['centralFrequency'] = value * 1E6
+        elif key == 'echot':
+            tidy_header['echotime'] = value / 1e3
+        else:
+            # dwelltime, deltat and badelt all specify the dwell time
+            tidy_header['dwelltime'] = value
+            tidy_header['bandwidth'] = 1 / value
 
     return tidy_header
@@ -203,6 +203,8 @@ class spec2nii:
         parser_raw.add_argument("-b", "--bandwidth", type=float,
                                 help="Optional. Receiver bandwidth (spectral width) in Hz.", required=False)
         parser_raw.add_argument("-a", "--affine", type=str, help="NIfTI affine file", required=False, metavar='<file>')
+        parser_raw.add_argument("--single", action='store_true',
+                                help="Store data as single precision (complex64) rather than double.")
         parser_raw = add_common_parameters(parser_raw)
         parser_raw.set_defaults(func=self.raw)
 
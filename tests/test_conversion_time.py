@@ -0,0 +1,56 @@
+'''Tests for the cached NIfTI-MRS ConversionTime value.
+
+Subject to the BSD 3-Clause License.
+'''
+from datetime import datetime, timedelta
+
+import pytest
+
+import spec2nii._conversion_time as conv_time
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    """Replace the monotonic clock and wall time with controllable fakes."""
+    state = {'now': 0.0, 'calls': 0}
+
+    class FakeDatetime:
+        @staticmethod
+        def now():
+            state['calls'] += 1
+            return datetime(2024, 1, 1) + timedelta(seconds=state['calls'])
+
+    monkeypatch.setattr(conv_time, 'monotonic', lambda: state['now'])
+    monkeypatch.setattr(conv_time, 'datetime', FakeDatetime)
+    monkeypatch.setattr(conv_time, '_conv_time', None)
+    monkeypatch.setattr(conv_time, '_conv_time_stamp', None)
+    return state
+
+
+def test_reuse_within_max_age(clock):
+    first = conv_time.get_conversion_time()
+    assert first == '2024-01-01T00:00:01.000'
+
+    clock['now'] = 1.0
+    assert conv_time.get_conversion_time() == first
+    assert clock['calls'] == 1
+
+
+def test_refresh_after_max_age(clock):
+    first = conv_time.get_conversion_time()
+
+    clock['now'] = 1.5
+    second = conv_time.get_conversion_time()
+    assert second != first
+    assert clock['calls'] == 2
+
+    clock['now'] = 2.0
+    assert conv_time.get_conversion_time(max_age=0.1) != second
+
+
+def test_never_expire(clock):
+    first = conv_time.get_conversion_time()
+
+    clock['now'] = 1E6
+    assert conv_time.get_conversion_time(max_age=None) == first
+    assert clock['calls'] == 1
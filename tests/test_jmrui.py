@@ -126,3 +126,30 @@ def test_jmrui_old(affine_file, tmp_path):
     assert converted.shape == (1, 1, 1, 2048)
     assert np.iscomplexobj(converted.dataobj)
     assert np.allclose(np.loadtxt(affine_file), converted.affine)
+
+
+def test_read_jmrui_txt(tmp_path):
+    """Test the jMRUI .txt reader on small synthetic files."""
+    from spec2nii.jmrui import readjMRUItxt
+
+    fids = np.arange(8, dtype=float).reshape(2, 4) + 1j * np.arange(8, 16, dtype=float).reshape(2, 4)
+    with open(tmp_path / 'test.txt', 'w') as fp:
+        fp.write('jMRUI Data Textfile\n\nFilename: test.txt\n\nPointsInDataset: 4\nDatasetsInFile: 2\n'
+                 'SamplingInterval: 5.0E-1\nTransmitterFrequency: 1.2325E8\nMagneticField: 2.89\n\n'
+                 'Signal and FFT\nsig(real)\tsig(imag)\tfft(real)\tfft(imag)\n')
+        for idx, fid in enumerate(fids):
+            fp.write(f'Signal {idx + 1} out of 2 in file\n')
+            for pt in fid:
+                # Any columns beyond the first two (FFT) are ignored
+                fp.write(f'{pt.real:.6E}\t{pt.imag:.6E}\t0.0\t0.0\n')
+
+    data, header = readjMRUItxt(tmp_path / 'test.txt')
+    assert data.shape == (4, 2)
+    assert np.allclose(data, fids.T.conj())
+    assert header['PointsInDataset'] == 4
+    assert np.isclose(header['SamplingInterval'], 0.5)
+
+    with open(tmp_path / 'bad.txt', 'w') as fp:
+        fp.write('PointsInDataset: 2\nSignal 1 out of 1 in file\n1.0\t2.0\n3.0\tx\n')
+    with pytest.raises(ValueError):
+        readjMRUItxt(tmp_path / 'bad.txt')
@@ -105,3 +105,59 @@ def test_raw_nohdr(affine_file, tmp_path):
     assert np.allclose(np.loadtxt(affine_file), converted.affine)
     assert np.allclose(converted.dataobj[:], original.dataobj[:])
     assert (tmp_path / 'raw.json').exists()
+
+
+def test_read_lcm_raw(tmp_path):
+    """Test the LCModel .RAW reader on a small synthetic file."""
+    from spec2nii.other_formats import readLCModelRaw
+
+    fid = np.arange(8, dtype=float) + 1j * np.arange(8, 16, dtype=float)
+    with open(tmp_path / 'test.RAW', 'w') as fp:
+        fp.write(' $SEQPAR\n ECHOT= 30.0\n HZPPPM= 1.2325E+02\n $END\n'
+                 ' $NMID\n ID=\'test\', FMTDAT=\'(2E16.6)\'\n DELTAT= 5.0E-04\n $END\n')
+        for pt in fid:
+            fp.write(f'  {pt.real:15.6E} {pt.imag:15.6E}\n')
+
+    data, header = readLCModelRaw(tmp_path / 'test.RAW', conjugate=False)
+    assert data.dtype == np.complex128
+    assert np.allclose(data, fid)
+    assert np.isclose(header['centralFrequency'], 123.25E6)
+    assert np.isclose(header['dwelltime'], 5.0E-4)
+    assert np.isclose(header['echotime'], 0.03)
+
+    data, _ = readLCModelRaw(tmp_path / 'test.RAW', conjugate=True)
+    assert np.allclose(data, fid.conj())
+
+    data, _ = readLCModelRaw(tmp_path / 'test.RAW', dtype=np.complex64)
+    assert data.dtype == np.complex64
+    assert np.allclose(data, fid.conj())
+
+    with open(tmp_path / 'odd.RAW', 'w') as fp:
+        fp.write('  1.0 2.0\n  3.0\n')
+    with pytest.raises(ValueError):
+        readLCModelRaw(tmp_path / 'odd.RAW')
+
+    with open(tmp_path / 'garbage.RAW', 'w') as fp:
+        fp.write(' $NMID\n DELTAT= 5.0E-04\n $END\n  1.0 2.0\n  3.0 4.0\n  x\n')
+    with pytest.raises(ValueError):
+        readLCModelRaw(tmp_path / 'garbage.RAW')
+
+    with open(tmp_path / 'fortran.RAW', 'w') as fp:
+        fp.write(' $NMID\n DELTAT= 5.0D-04\n $END\n  1.0 2.0\n')
+    _, header = readLCModelRaw(tmp_path / 'fortran.RAW')
+    assert np.isclose(header['dwelltime'], 5.0E-4)
+
+    with open(tmp_path / 'latin.RAW', 'wb') as fp:
+        fp.write(b" $NMID\n ID='M\xfcller'\n DELTAT= 5.0E-04\n $END\n  1.0 2.0\n")
+    _, header = readLCModelRaw(tmp_path / 'latin.RAW')
+    assert np.isclose(header['dwelltime'], 5.0E-4)
+
+    with open(tmp_path / 'nodata.RAW', 'w') as fp:
+        fp.write(' $NMID\n DELTAT= 5.0E-04\n $END\n')
+    with pytest.raises(ValueError):
+        readLCModelRaw(tmp_path / 'nodata.RAW')
+
+    with open(tmp_path / 'blank.RAW', 'w') as fp:
+        fp.write(' $NMID\n DELTAT= 5.0E-04\n $END\n\n  \n')
+    with pytest.raises(ValueError):
+        readLCModelRaw(tmp_path / 'blank.RAW')
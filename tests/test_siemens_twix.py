@@ -9,7 +9,9 @@ from pathlib import Path
 import json
 
 import numpy as np
+import pytest
 
+from spec2nii.Siemens.twixfunctions import _dimension_plan
 from .io_for_tests import read_nifti_mrs
 
 # Data paths
@@ -306,3 +308,22 @@ def test_twix_mrsi_orientation(tmp_path):
         twix = siemens_path / 'VEData' / 'Twix' / pair[0]
         dcm = siemens_path / 'VEData' / 'DICOM' / pair[1]
         run_comparison(twix, dcm)
+
+
+def test_dimension_plan_overrides():
+    """User dimension overrides are swapped into place, missing dimensions are rejected."""
+    sqz_dims = ('Col', 'Cha', 'Ave', 'Set')
+    dim_order, dim_tags, perm = _dimension_plan(
+        'vd', sqz_dims, ('Cha', 'Ave', 'Set'), ('Set', None, 'Cha'), (None, 'DIM_USER_0', None))
+
+    assert dim_order == ('Set', 'Ave', 'Cha')
+    assert dim_tags == ('DIM_DYN', 'DIM_USER_0', 'DIM_COIL')
+    assert perm == (0, 3, 2, 1)
+
+    # Permutation matches the moveaxis previously used to reorder the data
+    data = np.zeros((4, 2, 3, 5))
+    new = [sqz_dims.index(dd) for dd in dim_order]
+    assert data.transpose(perm).shape == np.moveaxis(data, range(1, 4), new).shape == (4, 5, 3, 2)
+
+    with pytest.raises(ValueError):
+        _dimension_plan('vd', ('Col', 'Cha', 'Ave'), ('Cha', 'Ave'), ('Rep', None, None), (None, None, None))